@@ -2,221 +2,311 @@ import streamlit as st
 import os
 import tempfile
 import numpy as np
-from src.data_processor import DataProcessor
-from src.visualization import Visualizer
+import pandas as pd
+from src.data_processor import DataProcessor, DISPLACEMENT_FIELDS, DERIVED_FIELDS
+from src.jobs import JobManager, preprocess_job, render_job, comparison_job
+from src.visualization import FIELD_LABELS
 import config
 
-st.set_page_config(page_title="FLAC3D后处理可视化工具", layout="wide")
-st.title("FLAC3D后处理交互式可视化工具")
-st.markdown("""
+# Streamlit以__main__执行本脚本；spawn启动的工作进程会以__mp_main__重新执行它，此时不构建页面
+if __name__ == "__main__":
+    st.set_page_config(page_title="FLAC3D后处理可视化工具", layout="wide")
+    st.title("FLAC3D后处理交互式可视化工具")
+    st.markdown("""
 本工具支持上传FLAC3D位移数据(txt)，一键生成多种可视化结果。\
 上传数据后可自定义插值分辨率，点击各自“生成”按钮即可在下方查看和下载图片。
 """)
 
-# 1. 文件上传和基础参数
-uploaded_file = st.file_uploader("请上传FLAC3D位移数据(txt)", type=["txt"])
-col1, col2 = st.columns(2)
-with col1:
-    grid_res = st.slider("插值网格分辨率", 50, 500, config.GRID_RESOLUTION)
-with col2:
-    interp_method = st.selectbox("插值方法", ["linear", "cubic", "nearest"], index=["linear", "cubic", "nearest"].index(config.INTERPOLATION_METHOD))
+    # 1. 文件上传和基础参数
+    uploaded_file = st.file_uploader("请上传FLAC3D位移数据(txt)", type=["txt"])
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        grid_res = st.slider("插值网格分辨率", 50, 500, config.GRID_RESOLUTION)
+    with col2:
+        interp_method = st.selectbox("插值方法", ["linear", "cubic", "nearest"], index=["linear", "cubic", "nearest"].index(config.INTERPOLATION_METHOD))
+    with col3:
+        render_mode = st.selectbox("渲染方式", ["contour", "image"], index=["contour", "image"].index(config.RENDER_MODE),
+                                   help="image：按像素分级着色，仅叠加标注等高线，密网格出图更快、PDF更小")
 
-# 2. 数据处理与插值（只做一次，缓存到session_state）
-if 'data_ready' not in st.session_state:
-    st.session_state['data_ready'] = False
+    # 2. 数据处理与插值（后台进程池执行，结果缓存到session_state）
+    @st.cache_resource
+    def get_job_manager():
+        return JobManager()
 
-if uploaded_file and st.button("数据预处理/刷新"):
-    with st.spinner("正在处理数据..."):
+
+    jobs = get_job_manager()
+
+
+    @st.fragment(run_every=0.5)
+    def job_progress(key, prefix=""):
+        """只在片段内定时刷新后台任务进度，任务结束后整页重跑以展示结果"""
+        job_id = st.session_state['jobs'].get(key)
+        if job_id is None or job_id not in jobs:
+            return
+        done, fraction, stage = jobs.status(job_id)
+        if done:
+            st.rerun()
+        st.progress(fraction, text=f"{prefix}{stage}")
+
+
+    if 'data_ready' not in st.session_state:
+        st.session_state['data_ready'] = False
+    if 'jobs' not in st.session_state:
+        st.session_state['jobs'] = {}
+    if 'images' not in st.session_state:
+        st.session_state['images'] = {}
+
+    if uploaded_file and st.button("数据预处理/刷新"):
         results_dir = os.path.join(os.getcwd(), "results")
         os.makedirs(results_dir, exist_ok=True)
         data_path = os.path.join(results_dir, "input.txt")
         with open(data_path, "wb") as f:
             f.write(uploaded_file.read())
-        config.INPUT_PATH = data_path
-        config.GRID_RESOLUTION = grid_res
-        config.INTERPOLATION_METHOD = interp_method
         config.RESULTS_DIR = results_dir
-        processor = DataProcessor()
-        if not processor.load_data():
-            st.error("数据加载失败，请检查数据格式！")
-            st.session_state['data_ready'] = False
-        else:
-            xi_grid, yi_grid, nx, ny = processor.create_interpolation_grid()
-            dx_grid = processor.interpolate_displacement(xi_grid, yi_grid, processor.dx)
-            dy_grid = processor.interpolate_displacement(xi_grid, yi_grid, processor.dy)
-            dz_grid = processor.interpolate_displacement(xi_grid, yi_grid, processor.dz)
-            tilt_x, tilt_y = processor.calculate_tilt(dz_grid, xi_grid, yi_grid)
-            curvature_x, curvature_y = processor.calculate_curvature(dz_grid, xi_grid, yi_grid)
-            strain_x, strain_y, shear_strain = processor.calculate_horizontal_strain(dx_grid, dy_grid, xi_grid, yi_grid)
-            # 缓存所有数据
-            st.session_state['data_ready'] = True
-            st.session_state['xi_grid'] = xi_grid
-            st.session_state['yi_grid'] = yi_grid
-            st.session_state['dx_grid'] = dx_grid
-            st.session_state['dy_grid'] = dy_grid
-            st.session_state['dz_grid'] = dz_grid
-            st.session_state['tilt_x'] = tilt_x
-            st.session_state['tilt_y'] = tilt_y
-            st.session_state['curvature_x'] = curvature_x
-            st.session_state['curvature_y'] = curvature_y
-            st.session_state['strain_x'] = strain_x
-            st.session_state['strain_y'] = strain_y
-            st.session_state['shear_strain'] = shear_strain
-            st.session_state['results_dir'] = results_dir
-            st.success("数据处理完成！可生成各类云图。")
-
-# 3. 各云图独立分区和按钮
-if st.session_state.get('data_ready', False):
-    visualizer = Visualizer()
-    xi_grid = st.session_state['xi_grid']
-    yi_grid = st.session_state['yi_grid']
-    dx_grid = st.session_state['dx_grid']
-    dy_grid = st.session_state['dy_grid']
-    dz_grid = st.session_state['dz_grid']
-    tilt_x = st.session_state['tilt_x']
-    tilt_y = st.session_state['tilt_y']
-    curvature_x = st.session_state['curvature_x']
-    curvature_y = st.session_state['curvature_y']
-    strain_x = st.session_state['strain_x']
-    strain_y = st.session_state['strain_y']
-    shear_strain = st.session_state['shear_strain']
-    results_dir = st.session_state['results_dir']
-    img_dir = results_dir
-
-    # X方向位移
-    with st.expander("X方向位移云图", expanded=True):
-        x_auto_saturate = st.checkbox("自动色阶饱和（1%~99%分位数）", value=True, key="x_auto_saturate")
-        if x_auto_saturate:
-            x_vmin_auto = float(np.nanpercentile(dx_grid, 1))
-            x_vmax_auto = float(np.nanpercentile(dx_grid, 99))
-        else:
-            x_vmin_auto = float(np.nanmin(dx_grid))
-            x_vmax_auto = float(np.nanmax(dx_grid))
-        x_vmin = st.number_input("色阶最小值", value=x_vmin_auto, key="x_vmin")
-        x_vmax = st.number_input("色阶最大值", value=x_vmax_auto, key="x_vmax")
-        x_contour_lines = st.slider("线型等高线数量", 2, 30, 10, key="x_contour_lines")
-        if st.button("生成X方向位移云图"):
-            visualizer.plot_displacement_contour(
-                xi_grid, yi_grid, dx_grid, "X方向位移", "displacement_x", "X方向位移", "mm",
-                vmin=x_vmin, vmax=x_vmax, contour_lines=x_contour_lines
-            )
-            img_path = os.path.join(img_dir, "displacement_x.png")
-            if os.path.exists(img_path):
-                st.image(img_path)
-                with open(img_path, "rb") as f:
-                    st.download_button("下载X方向位移图片", f.read(), file_name="displacement_x.png")
-
-    # Y方向位移
-    with st.expander("Y方向位移云图", expanded=False):
-        y_auto_saturate = st.checkbox("自动色阶饱和（1%~99%分位数）", value=True, key="y_auto_saturate")
-        if y_auto_saturate:
-            y_vmin_auto = float(np.nanpercentile(dy_grid, 1))
-            y_vmax_auto = float(np.nanpercentile(dy_grid, 99))
-        else:
-            y_vmin_auto = float(np.nanmin(dy_grid))
-            y_vmax_auto = float(np.nanmax(dy_grid))
-        y_vmin = st.number_input("色阶最小值", value=y_vmin_auto, key="y_vmin")
-        y_vmax = st.number_input("色阶最大值", value=y_vmax_auto, key="y_vmax")
-        y_contour_lines = st.slider("线型等高线数量", 2, 30, 10, key="y_contour_lines")
-        if st.button("生成Y方向位移云图"):
-            visualizer.plot_displacement_contour(
-                xi_grid, yi_grid, dy_grid, "Y方向位移", "displacement_y", "Y方向位移", "mm",
-                vmin=y_vmin, vmax=y_vmax, contour_lines=y_contour_lines
-            )
-            img_path = os.path.join(img_dir, "displacement_y.png")
-            if os.path.exists(img_path):
-                st.image(img_path)
-                with open(img_path, "rb") as f:
-                    st.download_button("下载Y方向位移图片", f.read(), file_name="displacement_y.png")
-
-    # Z方向位移
-    with st.expander("Z方向位移云图", expanded=False):
-        z_auto_saturate = st.checkbox("自动色阶饱和（1%~99%分位数）", value=True, key="z_auto_saturate")
-        if z_auto_saturate:
-            z_vmin_auto = float(np.nanpercentile(dz_grid, 1))
-            z_vmax_auto = float(np.nanpercentile(dz_grid, 99))
-        else:
-            z_vmin_auto = float(np.nanmin(dz_grid))
-            z_vmax_auto = float(np.nanmax(dz_grid))
-        z_vmin = st.number_input("色阶最小值", value=z_vmin_auto, key="z_vmin")
-        z_vmax = st.number_input("色阶最大值", value=z_vmax_auto, key="z_vmax")
-        z_contour_lines = st.slider("线型等高线数量", 2, 30, 10, key="z_contour_lines")
-        if st.button("生成Z方向位移云图"):
-            visualizer.plot_displacement_contour(
-                xi_grid, yi_grid, dz_grid, "Z方向位移", "displacement_z", "Z方向位移", "mm",
-                vmin=z_vmin, vmax=z_vmax, contour_lines=z_contour_lines
-            )
-            img_path = os.path.join(img_dir, "displacement_z.png")
-            if os.path.exists(img_path):
-                st.image(img_path)
-                with open(img_path, "rb") as f:
-                    st.download_button("下载Z方向位移图片", f.read(), file_name="displacement_z.png")
-
-    # 倾斜变形
-    with st.expander("倾斜变形云图", expanded=False):
-        tilt_auto_saturate = st.checkbox("自动色阶饱和（1%~99%分位数）", value=True, key="tilt_auto_saturate")
-        if tilt_auto_saturate:
-            tilt_vmin_auto = float(np.nanpercentile(np.concatenate([tilt_x.flatten(), tilt_y.flatten()]), 1))
-            tilt_vmax_auto = float(np.nanpercentile(np.concatenate([tilt_x.flatten(), tilt_y.flatten()]), 99))
-        else:
-            tilt_vmin_auto = float(np.nanmin([np.nanmin(tilt_x), np.nanmin(tilt_y)]))
-            tilt_vmax_auto = float(np.nanmax([np.nanmax(tilt_x), np.nanmax(tilt_y)]))
-        tilt_vmin = st.number_input("色阶最小值", value=tilt_vmin_auto, key="tilt_vmin")
-        tilt_vmax = st.number_input("色阶最大值", value=tilt_vmax_auto, key="tilt_vmax")
-        tilt_contour_lines = st.slider("线型等高线数量", 2, 30, 10, key="tilt_contour_lines")
-        if st.button("生成倾斜变形云图"):
-            visualizer.plot_tilt_contour(
-                xi_grid, yi_grid, tilt_x, tilt_y, "surface_tilt",
-                vmin=tilt_vmin, vmax=tilt_vmax, contour_lines=tilt_contour_lines
-            )
-            img_path = os.path.join(img_dir, "surface_tilt.png")
-            if os.path.exists(img_path):
-                st.image(img_path)
-                with open(img_path, "rb") as f:
-                    st.download_button("下载倾斜变形图片", f.read(), file_name="surface_tilt.png")
-
-    # 曲率
-    with st.expander("曲率云图", expanded=False):
-        curv_auto_saturate = st.checkbox("自动色阶饱和（1%~99%分位数）", value=True, key="curv_auto_saturate")
-        if curv_auto_saturate:
-            curv_vmin_auto = float(np.nanpercentile(np.concatenate([curvature_x.flatten(), curvature_y.flatten()]), 1))
-            curv_vmax_auto = float(np.nanpercentile(np.concatenate([curvature_x.flatten(), curvature_y.flatten()]), 99))
+        st.session_state['results_dir'] = results_dir
+        st.session_state['data_path'] = data_path
+        st.session_state['interp_method'] = interp_method
+        st.session_state['jobs']['preprocess'] = jobs.submit(preprocess_job, data_path, grid_res, interp_method)
+
+    preprocess_id = st.session_state['jobs'].get('preprocess')
+    if preprocess_id is not None and preprocess_id in jobs:
+        done = jobs.status(preprocess_id)[0]
+        if not done:
+            job_progress('preprocess', "正在处理数据：")
         else:
-            curv_vmin_auto = float(np.nanmin([np.nanmin(curvature_x), np.nanmin(curvature_y)]))
-            curv_vmax_auto = float(np.nanmax([np.nanmax(curvature_x), np.nanmax(curvature_y)]))
-        curv_vmin = st.number_input("色阶最小值", value=curv_vmin_auto, key="curv_vmin")
-        curv_vmax = st.number_input("色阶最大值", value=curv_vmax_auto, key="curv_vmax")
-        curv_contour_lines = st.slider("线型等高线数量", 2, 30, 10, key="curv_contour_lines")
-        if st.button("生成曲率云图"):
-            visualizer.plot_curvature_contour(
-                xi_grid, yi_grid, curvature_x, curvature_y, "surface_curvature",
-                vmin=curv_vmin, vmax=curv_vmax, contour_lines=curv_contour_lines
-            )
-            img_path = os.path.join(img_dir, "surface_curvature.png")
-            if os.path.exists(img_path):
-                st.image(img_path)
-                with open(img_path, "rb") as f:
-                    st.download_button("下载曲率图片", f.read(), file_name="surface_curvature.png")
-
-    # 水平变形
-    with st.expander("水平变形云图", expanded=False):
-        strain_auto_saturate = st.checkbox("自动色阶饱和（1%~99%分位数）", value=True, key="strain_auto_saturate")
-        if strain_auto_saturate:
-            strain_vmin_auto = float(np.nanpercentile(np.concatenate([strain_x.flatten(), strain_y.flatten(), shear_strain.flatten()]), 1))
-            strain_vmax_auto = float(np.nanpercentile(np.concatenate([strain_x.flatten(), strain_y.flatten(), shear_strain.flatten()]), 99))
+            del st.session_state['jobs']['preprocess']
+            try:
+                fields = jobs.result(preprocess_id)
+            except Exception as e:
+                st.error(f"数据处理失败：{e}")
+                st.session_state['data_ready'] = False
+            else:
+                if fields is None:
+                    st.error("数据加载失败，请检查数据格式！")
+                    st.session_state['data_ready'] = False
+                else:
+                    # 缓存所有数据
+                    st.session_state.update(fields)
+                    st.session_state['data_ready'] = True
+                    st.session_state['images'] = {}
+                    st.success("数据处理完成！可生成各类云图。")
+
+
+    @st.cache_resource
+    def get_query_processor(data_path, mtime):
+        """按数据文件缓存已建立空间索引的处理器，测点/剖面查询直接复用"""
+        processor = DataProcessor()
+        # 加载失败时抛出异常，cache_resource不会缓存这个未建立索引的处理器
+        if not processor.load_data(data_path):
+            raise ValueError(f"无法加载数据文件：{data_path}")
+        return processor
+
+
+    def color_range(auto_saturate, *grids):
+        """色阶默认范围，只统计有效网格单元；auto_saturate时取1%~99%分位数"""
+        values = DataProcessor.valid_values(st.session_state['mask'], *grids)
+        if values.size == 0:
+            return 0.0, 0.0
+        if auto_saturate:
+            vmin, vmax = np.percentile(values, [1, 99])
         else:
-            strain_vmin_auto = float(np.nanmin([np.nanmin(strain_x), np.nanmin(strain_y), np.nanmin(shear_strain)]))
-            strain_vmax_auto = float(np.nanmax([np.nanmax(strain_x), np.nanmax(strain_y), np.nanmax(shear_strain)]))
-        strain_vmin = st.number_input("色阶最小值", value=strain_vmin_auto, key="strain_vmin")
-        strain_vmax = st.number_input("色阶最大值", value=strain_vmax_auto, key="strain_vmax")
-        strain_contour_lines = st.slider("线型等高线数量", 2, 30, 10, key="strain_contour_lines")
-        if st.button("生成水平变形云图"):
-            visualizer.plot_strain_contour(
-                xi_grid, yi_grid, strain_x, strain_y, shear_strain, "horizontal_strain",
-                vmin=strain_vmin, vmax=strain_vmax, contour_lines=strain_contour_lines
-            )
-            img_path = os.path.join(img_dir, "horizontal_strain.png")
-            if os.path.exists(img_path):
-                st.image(img_path)
-                with open(img_path, "rb") as f:
-                    st.download_button("下载水平变形图片", f.read(), file_name="horizontal_strain.png") 
\ No newline at end of file
+            vmin, vmax = values.min(), values.max()
+        return float(vmin), float(vmax)
+
+
+    def figure_job(filename, button_label, plot_name, args, kwargs, download_label):
+        """提交某个云图的后台出图任务，并显示其进度或结果图片"""
+        if st.button(button_label):
+            st.session_state['jobs'][filename] = jobs.submit(
+                render_job, plot_name, filename, args, kwargs, st.session_state['results_dir'], render_mode)
+            st.session_state['images'].pop(filename, None)
+        job_id = st.session_state['jobs'].get(filename)
+        if job_id is not None and job_id in jobs:
+            done = jobs.status(job_id)[0]
+            if not done:
+                job_progress(filename)
+                return
+            del st.session_state['jobs'][filename]
+            try:
+                st.session_state['images'][filename] = jobs.result(job_id)
+            except Exception as e:
+                st.error(f"出图失败：{e}")
+        img_path = st.session_state['images'].get(filename)
+        if img_path and os.path.exists(img_path):
+            st.image(img_path)
+            with open(img_path, "rb") as f:
+                st.download_button(download_label, f.read(), file_name=os.path.basename(img_path))
+
+
+    # 3. 各云图独立分区和按钮
+    if st.session_state.get('data_ready', False):
+        xi_grid = st.session_state['xi_grid']
+        yi_grid = st.session_state['yi_grid']
+        dx_grid = st.session_state['dx_grid']
+        dy_grid = st.session_state['dy_grid']
+        dz_grid = st.session_state['dz_grid']
+        tilt_x = st.session_state['tilt_x']
+        tilt_y = st.session_state['tilt_y']
+        curvature_x = st.session_state['curvature_x']
+        curvature_y = st.session_state['curvature_y']
+        strain_x = st.session_state['strain_x']
+        strain_y = st.session_state['strain_y']
+        shear_strain = st.session_state['shear_strain']
+        results_dir = st.session_state['results_dir']
+
+        # X方向位移
+        with st.expander("X方向位移云图", expanded=True):
+            x_auto_saturate = st.checkbox("自动色阶饱和（1%~99%分位数）", value=True, key="x_auto_saturate")
+            x_vmin_auto, x_vmax_auto = color_range(x_auto_saturate, dx_grid)
+            x_vmin = st.number_input("色阶最小值", value=x_vmin_auto, key="x_vmin")
+            x_vmax = st.number_input("色阶最大值", value=x_vmax_auto, key="x_vmax")
+            x_contour_lines = st.slider("线型等高线数量", 2, 30, 10, key="x_contour_lines")
+            figure_job("displacement_x", "生成X方向位移云图", "plot_displacement_contour",
+                       (xi_grid, yi_grid, dx_grid, "X方向位移", "displacement_x", "X方向位移", "mm"),
+                       dict(vmin=x_vmin, vmax=x_vmax, contour_lines=x_contour_lines), "下载X方向位移图片")
+
+        # Y方向位移
+        with st.expander("Y方向位移云图", expanded=False):
+            y_auto_saturate = st.checkbox("自动色阶饱和（1%~99%分位数）", value=True, key="y_auto_saturate")
+            y_vmin_auto, y_vmax_auto = color_range(y_auto_saturate, dy_grid)
+            y_vmin = st.number_input("色阶最小值", value=y_vmin_auto, key="y_vmin")
+            y_vmax = st.number_input("色阶最大值", value=y_vmax_auto, key="y_vmax")
+            y_contour_lines = st.slider("线型等高线数量", 2, 30, 10, key="y_contour_lines")
+            figure_job("displacement_y", "生成Y方向位移云图", "plot_displacement_contour",
+                       (xi_grid, yi_grid, dy_grid, "Y方向位移", "displacement_y", "Y方向位移", "mm"),
+                       dict(vmin=y_vmin, vmax=y_vmax, contour_lines=y_contour_lines), "下载Y方向位移图片")
+
+        # Z方向位移
+        with st.expander("Z方向位移云图", expanded=False):
+            z_auto_saturate = st.checkbox("自动色阶饱和（1%~99%分位数）", value=True, key="z_auto_saturate")
+            z_vmin_auto, z_vmax_auto = color_range(z_auto_saturate, dz_grid)
+            z_vmin = st.number_input("色阶最小值", value=z_vmin_auto, key="z_vmin")
+            z_vmax = st.number_input("色阶最大值", value=z_vmax_auto, key="z_vmax")
+            z_contour_lines = st.slider("线型等高线数量", 2, 30, 10, key="z_contour_lines")
+            figure_job("displacement_z", "生成Z方向位移云图", "plot_displacement_contour",
+                       (xi_grid, yi_grid, dz_grid, "Z方向位移", "displacement_z", "Z方向位移", "mm"),
+                       dict(vmin=z_vmin, vmax=z_vmax, contour_lines=z_contour_lines), "下载Z方向位移图片")
+
+        # 倾斜变形
+        with st.expander("倾斜变形云图", expanded=False):
+            tilt_auto_saturate = st.checkbox("自动色阶饱和（1%~99%分位数）", value=True, key="tilt_auto_saturate")
+            tilt_vmin_auto, tilt_vmax_auto = color_range(tilt_auto_saturate, tilt_x, tilt_y)
+            tilt_vmin = st.number_input("色阶最小值", value=tilt_vmin_auto, key="tilt_vmin")
+            tilt_vmax = st.number_input("色阶最大值", value=tilt_vmax_auto, key="tilt_vmax")
+            tilt_contour_lines = st.slider("线型等高线数量", 2, 30, 10, key="tilt_contour_lines")
+            figure_job("surface_tilt", "生成倾斜变形云图", "plot_tilt_contour",
+                       (xi_grid, yi_grid, tilt_x, tilt_y, "surface_tilt"),
+                       dict(vmin=tilt_vmin, vmax=tilt_vmax, contour_lines=tilt_contour_lines), "下载倾斜变形图片")
+
+        # 曲率
+        with st.expander("曲率云图", expanded=False):
+            curv_auto_saturate = st.checkbox("自动色阶饱和（1%~99%分位数）", value=True, key="curv_auto_saturate")
+            curv_vmin_auto, curv_vmax_auto = color_range(curv_auto_saturate, curvature_x, curvature_y)
+            curv_vmin = st.number_input("色阶最小值", value=curv_vmin_auto, key="curv_vmin")
+            curv_vmax = st.number_input("色阶最大值", value=curv_vmax_auto, key="curv_vmax")
+            curv_contour_lines = st.slider("线型等高线数量", 2, 30, 10, key="curv_contour_lines")
+            figure_job("surface_curvature", "生成曲率云图", "plot_curvature_contour",
+                       (xi_grid, yi_grid, curvature_x, curvature_y, "surface_curvature"),
+                       dict(vmin=curv_vmin, vmax=curv_vmax, contour_lines=curv_contour_lines), "下载曲率图片")
+
+        # 水平变形
+        with st.expander("水平变形云图", expanded=False):
+            strain_auto_saturate = st.checkbox("自动色阶饱和（1%~99%分位数）", value=True, key="strain_auto_saturate")
+            strain_vmin_auto, strain_vmax_auto = color_range(strain_auto_saturate, strain_x, strain_y, shear_strain)
+            strain_vmin = st.number_input("色阶最小值", value=strain_vmin_auto, key="strain_vmin")
+            strain_vmax = st.number_input("色阶最大值", value=strain_vmax_auto, key="strain_vmax")
+            strain_contour_lines = st.slider("线型等高线数量", 2, 30, 10, key="strain_contour_lines")
+            figure_job("horizontal_strain", "生成水平变形云图", "plot_strain_contour",
+                       (xi_grid, yi_grid, strain_x, strain_y, shear_strain, "horizontal_strain"),
+                       dict(vmin=strain_vmin, vmax=strain_vmax, contour_lines=strain_contour_lines), "下载水平变形图片")
+
+        # 剖面与测点查询
+        with st.expander("剖面与测点查询", expanded=False):
+            y_mid = float(np.mean(yi_grid[:, 0]))
+            query_text = st.text_area(
+                "折线顶点或测点坐标（每行 x, y）",
+                value=f"{xi_grid[0, 0]:.2f}, {y_mid:.2f}\n{xi_grid[0, -1]:.2f}, {y_mid:.2f}", key="query_text")
+            query_mode = st.radio("查询方式", ["剖面线", "测点"], horizontal=True, key="query_mode")
+            query_fields = st.multiselect("查询字段", DISPLACEMENT_FIELDS + DERIVED_FIELDS, default=["dz"], key="query_fields")
+            profile_num = st.slider("剖面采样点数", 50, 2000, 200, key="profile_num")
+            if st.button("查询") and query_fields:
+                try:
+                    query_points = np.array([[float(v) for v in line.replace("，", ",").split(",")]
+                                             for line in query_text.splitlines() if line.strip()])
+                    if query_points.ndim != 2 or query_points.shape[1] != 2:
+                        raise ValueError("每行需为 x, y 两个数")
+                except ValueError as e:
+                    st.error(f"坐标格式错误：{e}")
+                else:
+                    data_path = st.session_state['data_path']
+                    try:
+                        processor = get_query_processor(data_path, os.path.getmtime(data_path))
+                    except (OSError, ValueError) as e:
+                        st.error(f"查询数据加载失败：{e}")
+                    else:
+                        step = float(xi_grid[0, 1] - xi_grid[0, 0])
+                        method = st.session_state['interp_method']
+                        if query_mode == "剖面线":
+                            if len(query_points) < 2:
+                                st.error("剖面线至少需要两个顶点")
+                            else:
+                                profile = processor.sample_profile(query_points, profile_num, query_fields, step, method)
+                                df = pd.DataFrame(profile).set_index("distance")
+                                st.line_chart(df[query_fields])
+                                st.dataframe(df)
+                                st.download_button("下载剖面数据", df.to_csv().encode("utf-8-sig"), file_name="profile.csv")
+                        else:
+                            values = processor.sample_points(query_points[:, 0], query_points[:, 1], query_fields, step, method)
+                            df = pd.DataFrame({"x": query_points[:, 0], "y": query_points[:, 1], **values})
+                            st.dataframe(df)
+                            st.download_button("下载测点数据", df.to_csv(index=False).encode("utf-8-sig"), file_name="points.csv")
+
+    # 4. 多方案对比（同一网格导出的多个位移文件，第一个为基准方案）
+    with st.expander("多方案对比", expanded=False):
+        compare_files = st.file_uploader("上传多个方案的位移数据(txt)，第一个为基准", type=["txt"],
+                                         accept_multiple_files=True, key="compare_files")
+        compare_field = st.selectbox("对比字段", list(FIELD_LABELS), format_func=lambda name: FIELD_LABELS[name][0],
+                                     index=list(FIELD_LABELS).index("dz_grid"), key="compare_field")
+        compare_mode = st.radio("与基准方案比较", ["difference", "ratio"], horizontal=True, key="compare_mode",
+                                format_func=lambda mode: {"difference": "差值", "ratio": "比值"}[mode])
+        # 各方案多为同名的top_surface_disp.txt，默认名称加上序号，可逐个修改
+        compare_labels = [st.text_input(f"方案{i + 1}名称", value=f"{i + 1}_{os.path.splitext(compare_file.name)[0]}",
+                                        key=f"compare_label_{compare_file.file_id}").strip()
+                          for i, compare_file in enumerate(compare_files or [])]
+        if compare_files and st.button("生成方案对比"):
+            if not all(compare_labels) or len(set(compare_labels)) < len(compare_labels):
+                st.error("方案名称不能为空或重复")
+            else:
+                results_dir = os.path.join(os.getcwd(), "results")
+                os.makedirs(results_dir, exist_ok=True)
+                compare_paths = []
+                for i, compare_file in enumerate(compare_files):
+                    compare_path = os.path.join(results_dir, f"compare_input_{i}.txt")
+                    with open(compare_path, "wb") as f:
+                        f.write(compare_file.read())
+                    compare_paths.append(compare_path)
+                st.session_state['jobs']['comparison'] = jobs.submit(
+                    comparison_job, compare_paths, compare_labels, grid_res, interp_method, compare_field, compare_mode,
+                    results_dir, render_mode)
+                st.session_state.pop('comparison', None)
+        comparison_id = st.session_state['jobs'].get('comparison')
+        if comparison_id is not None and comparison_id in jobs:
+            done = jobs.status(comparison_id)[0]
+            if not done:
+                job_progress('comparison')
+            else:
+                del st.session_state['jobs']['comparison']
+                try:
+                    st.session_state['comparison'] = jobs.result(comparison_id)
+                except Exception as e:
+                    st.error(f"方案对比失败：{e}")
+        comparison = st.session_state.get('comparison')
+        if comparison is not None:
+            st.dataframe(comparison['statistics'])
+            st.download_button("下载对比统计", comparison['statistics'].to_csv(index=False).encode("utf-8-sig"),
+                               file_name="comparison_statistics.csv")
+            for img_path in comparison['images']:
+                if os.path.exists(img_path):
+                    st.image(img_path)
+                    with open(img_path, "rb") as f:
+                        st.download_button(f"下载{os.path.basename(img_path)}", f.read(), file_name=os.path.basename(img_path))
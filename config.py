@@ -13,6 +13,7 @@ else:
 DATA_DIR = os.path.join(BASE_DIR, 'data')
 RESULTS_DIR = os.path.join(BASE_DIR, 'results')
 SRC_DIR = os.path.join(BASE_DIR, 'src')
+GOLDEN_DIR = os.path.join(BASE_DIR, 'golden')  # 数值回归基准（合成地表及各字段基准数组）
 
 # 数据文件配置
 INPUT_FILE = 'top_surface_disp.txt'
@@ -21,12 +22,14 @@ INPUT_PATH = os.path.join(DATA_DIR, INPUT_FILE)
 # 插值配置
 GRID_RESOLUTION = 200  # 网格分辨率
 INTERPOLATION_METHOD = 'cubic'  # 插值方法：'linear', 'cubic', 'nearest'
+MASK_DISTANCE_FACTOR = 1.5  # 网格点距最近节点超过节点间距的该倍数时视为无效（凹形/L形模型表面），网格渐变很剧烈时可适当调大，None为仅按凸包判断
 
 # 绘图配置
 FIGURE_SIZE = (12, 8)
 DPI = 300
 COLORMAP = 'jet'  # 颜色映射：'jet', 'viridis', 'plasma', 'coolwarm'
 CONTOUR_LEVELS = 50
+RENDER_MODE = 'contour'  # 渲染方式：'contour'（contourf填充）, 'image'（imshow分级着色，密网格更快、文件更小）
 
 # 单位转换配置
 DISPLACEMENT_TO_MM = 1000  # 位移单位转换为mm（假设原单位为m）
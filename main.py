@@ -86,6 +86,7 @@ def main():
 
     # 绘制水平变形云图
     visualizer.plot_strain_contour(xi_grid, yi_grid, strain_x, strain_y, shear_strain, "horizontal_strain")
+    visualizer.close()
 
     print("\n=== 处理完成！ ===")
     print(f"结果文件保存在：{config.RESULTS_DIR}")
@@ -1,8 +1,13 @@
 import numpy as np
 import pandas as pd
-from scipy.interpolate import griddata
+from scipy.interpolate import LinearNDInterpolator, CloughTocher2DInterpolator
+from scipy.spatial import Delaunay, cKDTree
 import config
 
+# 可查询的字段：三向位移及由dz、dx/dy派生的倾斜、曲率和水平变形
+DISPLACEMENT_FIELDS = ['dx', 'dy', 'dz']
+DERIVED_FIELDS = ['tilt_x', 'tilt_y', 'curvature_x', 'curvature_y', 'strain_x', 'strain_y', 'shear_strain']
+
 class DataProcessor:
     def __init__(self):
         self.data = None
@@ -11,9 +16,17 @@ class DataProcessor:
         self.dx = None
         self.dy = None
         self.dz = None
+        # 加载时建立一次的空间索引，网格插值与点/剖面查询共用
+        self.tri = None
+        self.kdtree = None
+        # 各节点到最近的不重合节点的距离，用于判断网格单元是否远离节点
+        self.node_spacing = None
+        # 插值网格的有效单元掩膜，由create_interpolation_grid生成
+        self.mask = None
+        self._query_interpolators = {}
         
-    def load_data(self, file_path=None):
-        """加载FLAC3D位移数据"""
+    def load_data(self, file_path=None, build_index=True):
+        """加载FLAC3D位移数据，build_index为False时不建立空间索引（对比方案共用基准方案的索引）"""
         if file_path is None:
             file_path = config.INPUT_PATH
             
@@ -88,7 +101,34 @@ class DataProcessor:
                 print(f"备用方法也失败：{e2}")
                 return False
             
+        if build_index:
+            self.build_spatial_index()
         return True
+
+    def build_spatial_index(self):
+        """对节点建立Delaunay三角剖分和KD树，后续插值与查询不再重复剖分"""
+        points = np.column_stack([self.x, self.y])
+        self.tri = Delaunay(points)
+        self.kdtree = cKDTree(points)
+        # 按不重合坐标计算最近邻距离，重复导出的节点不会使间距变为0
+        unique_points, inverse = np.unique(points, axis=0, return_inverse=True)
+        if len(unique_points) > 1:
+            self.node_spacing = cKDTree(unique_points).query(unique_points, k=2)[0][:, 1][inverse.ravel()]
+        else:
+            self.node_spacing = np.zeros(len(points))
+        self._query_interpolators = {}
+
+    def _make_interpolator(self, values, method=None):
+        """基于已建立的空间索引构造插值器，结果与griddata同方法一致"""
+        if method is None:
+            method = config.INTERPOLATION_METHOD
+        if method == 'linear':
+            return LinearNDInterpolator(self.tri, values)
+        if method == 'cubic':
+            return CloughTocher2DInterpolator(self.tri, values)
+        if method == 'nearest':
+            return lambda xi, yi: values[self.kdtree.query(np.stack([xi, yi], axis=-1))[1]]
+        raise ValueError(f"未知的插值方法: {method}")
     
     def create_interpolation_grid(self):
         """创建插值网格，保持XY比例一致"""
@@ -103,37 +143,267 @@ class DataProcessor:
         xi = np.linspace(self.x.min(), self.x.max(), nx)
         yi = np.linspace(self.y.min(), self.y.max(), ny)
         xi_grid, yi_grid = np.meshgrid(xi, yi)
+        self.mask = self.create_validity_mask(np.column_stack([xi_grid.ravel(), yi_grid.ravel()])).reshape(xi_grid.shape)
         return xi_grid, yi_grid, nx, ny
+
+    def create_validity_mask(self, points, method=None):
+        """points为(n, 2)坐标数组，返回(n,)有效性：linear/cubic要求位于节点凸包内，并剔除距最近节点过远的点"""
+        if method is None:
+            method = config.INTERPOLATION_METHOD
+        mask = np.ones(len(points), dtype=bool)
+        if method != 'nearest':
+            mask &= self.tri.find_simplex(points) >= 0
+        # 节点间距为0（全部节点重合）时无从判断距离，仅按凸包判断
+        if config.MASK_DISTANCE_FACTOR is not None and self.node_spacing.max() > 0:
+            dist, nearest = self.kdtree.query(points[mask])
+            # 参照间距取全局中位间距与最近节点自身间距的较大者，网格渐变时外围的大单元不被误删
+            spacing = np.maximum(np.median(self.node_spacing), self.node_spacing[nearest])
+            mask[mask] = dist <= config.MASK_DISTANCE_FACTOR * spacing
+        return mask
     
-    def interpolate_displacement(self, xi_grid, yi_grid, displacement_data):
-        zi = griddata((self.x, self.y), displacement_data, (xi_grid, yi_grid), method=config.INTERPOLATION_METHOD)
+    def interpolate_displacement(self, xi_grid, yi_grid, displacement_data, mask=None):
+        """只在有效单元上插值，其余单元为NaN；mask缺省时使用当前插值网格的掩膜"""
+        if mask is None:
+            if self.mask is not None and self.mask.shape == xi_grid.shape:
+                mask = self.mask
+            else:
+                mask = self.create_validity_mask(np.column_stack([xi_grid.ravel(), yi_grid.ravel()])).reshape(xi_grid.shape)
+        zi = np.full(xi_grid.shape, np.nan)
+        zi[mask] = self._make_interpolator(displacement_data)(xi_grid[mask], yi_grid[mask])
         return zi
+
+    @staticmethod
+    def masked_gradient(f, coords, axis):
+        """沿axis求导：内部用中心差分（与np.gradient一致），有效区边界处退化为单侧差分，无效单元保持NaN"""
+        f = np.moveaxis(f, axis, 0)
+        pad = [(1, 1)] + [(0, 0)] * (f.ndim - 1)
+        fp = np.pad(f, pad, constant_values=np.nan)
+        cp = np.pad(np.asarray(coords, dtype=float), 1, constant_values=np.nan)
+        cp = cp.reshape((-1,) + (1,) * (f.ndim - 1))
+        with np.errstate(invalid='ignore'):
+            central = (fp[2:] - fp[:-2]) / (cp[2:] - cp[:-2])
+            forward = (fp[2:] - f) / (cp[2:] - cp[1:-1])
+            backward = (f - fp[:-2]) / (cp[1:-1] - cp[:-2])
+        grad = np.where(np.isfinite(central), central, np.where(np.isfinite(forward), forward, backward))
+        grad[~np.isfinite(f)] = np.nan
+        return np.moveaxis(grad, 0, axis)
+
+    @staticmethod
+    def _stencil_derivative(plus, center, minus, step):
+        """三点模板上的一阶导数，规则与masked_gradient相同：两侧有效时中心差分，否则单侧差分，中心无效时为NaN"""
+        with np.errstate(invalid='ignore'):
+            central = (plus - minus) / (2 * step)
+            forward = (plus - center) / step
+            backward = (center - minus) / step
+        grad = np.where(np.isfinite(central), central, np.where(np.isfinite(forward), forward, backward))
+        return np.where(np.isfinite(center), grad, np.nan)
+
+    @staticmethod
+    def valid_values(mask, *grids):
+        """拼接各网格字段在有效单元上的有限值，供分位数等统计使用；mask为None时取全部单元"""
+        values = np.concatenate([g[mask] if mask is not None else g.ravel() for g in grids])
+        return values[np.isfinite(values)]
     
     def calculate_tilt(self, zi, xi_grid, yi_grid):
-        # 计算梯度，第二个参数为物理坐标
-        dz_dy, dz_dx = np.gradient(zi, yi_grid[:,0], xi_grid[0,:])
+        # 计算梯度，第二个参数为物理坐标；有效区边界用单侧差分
+        # 沿最后两维求导，zi可以是多个方案叠成的(N, ny, nx)数组
+        dz_dy = self.masked_gradient(zi, yi_grid[:,0], axis=-2)
+        dz_dx = self.masked_gradient(zi, xi_grid[0,:], axis=-1)
         tilt_x = dz_dx  # 单位：mm/m
         tilt_y = dz_dy  # 单位：mm/m
         return tilt_x, tilt_y
     
     def calculate_curvature(self, zi, xi_grid, yi_grid):
         # 计算二阶导数，第二个参数为物理坐标
-        d2z_dx2 = np.gradient(np.gradient(zi, xi_grid[0,:], axis=1), xi_grid[0,:], axis=1)
-        d2z_dy2 = np.gradient(np.gradient(zi, yi_grid[:,0], axis=0), yi_grid[:,0], axis=0)
+        d2z_dx2 = self.masked_gradient(self.masked_gradient(zi, xi_grid[0,:], axis=-1), xi_grid[0,:], axis=-1)
+        d2z_dy2 = self.masked_gradient(self.masked_gradient(zi, yi_grid[:,0], axis=-2), yi_grid[:,0], axis=-2)
         curvature_x = d2z_dx2  # 单位：1/m，等价于10^-3/m
         curvature_y = d2z_dy2  # 单位：1/m，等价于10^-3/m
         return curvature_x, curvature_y
     
     def calculate_horizontal_strain(self, dx_grid, dy_grid, xi_grid, yi_grid):
-        d_dx_dx = np.gradient(dx_grid, xi_grid[0,:], axis=1)
-        d_dy_dy = np.gradient(dy_grid, yi_grid[:,0], axis=0)
-        d_dx_dy = np.gradient(dx_grid, yi_grid[:,0], axis=0)
-        d_dy_dx = np.gradient(dy_grid, xi_grid[0,:], axis=1)
+        d_dx_dx = self.masked_gradient(dx_grid, xi_grid[0,:], axis=-1)
+        d_dy_dy = self.masked_gradient(dy_grid, yi_grid[:,0], axis=-2)
+        d_dx_dy = self.masked_gradient(dx_grid, yi_grid[:,0], axis=-2)
+        d_dy_dx = self.masked_gradient(dy_grid, xi_grid[0,:], axis=-1)
         strain_x = d_dx_dx  # 单位：mm/m
         strain_y = d_dy_dy  # 单位：mm/m
         shear_strain = (d_dx_dy + d_dy_dx) / 2  # 单位：mm/m
         return strain_x, strain_y, shear_strain
     
+    def compute_fields(self, report=None):
+        """创建插值网格并计算全部网格字段，report(进度, 阶段)在各阶段开始时回调"""
+        if report is None:
+            report = lambda fraction, stage: None
+        report(0.1, "创建插值网格")
+        xi_grid, yi_grid, nx, ny = self.create_interpolation_grid()
+        report(0.15, "插值X方向位移")
+        dx_grid = self.interpolate_displacement(xi_grid, yi_grid, self.dx)
+        report(0.4, "插值Y方向位移")
+        dy_grid = self.interpolate_displacement(xi_grid, yi_grid, self.dy)
+        report(0.65, "插值Z方向位移")
+        dz_grid = self.interpolate_displacement(xi_grid, yi_grid, self.dz)
+        report(0.9, "计算倾斜、曲率和水平变形")
+        tilt_x, tilt_y = self.calculate_tilt(dz_grid, xi_grid, yi_grid)
+        curvature_x, curvature_y = self.calculate_curvature(dz_grid, xi_grid, yi_grid)
+        strain_x, strain_y, shear_strain = self.calculate_horizontal_strain(dx_grid, dy_grid, xi_grid, yi_grid)
+        report(1.0, "完成")
+        return {
+            'xi_grid': xi_grid, 'yi_grid': yi_grid,
+            'dx_grid': dx_grid, 'dy_grid': dy_grid, 'dz_grid': dz_grid,
+            'tilt_x': tilt_x, 'tilt_y': tilt_y,
+            'curvature_x': curvature_x, 'curvature_y': curvature_y,
+            'strain_x': strain_x, 'strain_y': strain_y, 'shear_strain': shear_strain,
+            'mask': self.mask,
+        }
+
+    def load_comparison(self, file_paths):
+        """加载同一网格导出的多个方案，第一个为基准；返回各方案节点位移(N, 节点数, 3)，节点顺序对齐基准"""
+        if not self.load_data(file_paths[0]):
+            raise ValueError(f"基准方案加载失败：{file_paths[0]}")
+        displacements = [np.column_stack([self.dx, self.dy, self.dz])]
+        order = np.argsort(self.data[:, 0])
+        for path in file_paths[1:]:
+            other = DataProcessor()
+            if not other.load_data(path, build_index=False):
+                raise ValueError(f"对比方案加载失败：{path}")
+            values = np.column_stack([other.dx, other.dy, other.dz])
+            if len(other.x) != len(self.x):
+                raise ValueError(f"{path} 的节点数与基准方案不一致")
+            if not (np.allclose(other.x, self.x) and np.allclose(other.y, self.y)):
+                # 节点顺序不同时按节点ID对齐
+                other_order = np.argsort(other.data[:, 0])
+                if not (np.allclose(other.x[other_order], self.x[order])
+                        and np.allclose(other.y[other_order], self.y[order])):
+                    raise ValueError(f"{path} 与基准方案不是同一网格")
+                aligned = np.empty_like(values)
+                aligned[order] = values[other_order]
+                values = aligned
+            displacements.append(values)
+        return np.stack(displacements)
+
+    def compute_comparison_fields(self, displacements, ratio_threshold=1e-3):
+        """在共用网格上一次性插值全部方案并计算派生字段及与基准的差值/比值；基准近零处比值为NaN"""
+        n_sets = len(displacements)
+        xi_grid, yi_grid, nx, ny = self.create_interpolation_grid()
+        mask = self.mask
+        # 所有方案的三向位移拼成(节点数, 3N)，共用一次三角剖分与点定位
+        values = displacements.transpose(1, 0, 2).reshape(len(self.x), 3 * n_sets)
+        stacked = np.full((n_sets * 3,) + xi_grid.shape, np.nan)
+        stacked[:, mask] = self._make_interpolator(values)(xi_grid[mask], yi_grid[mask]).T
+        stacked = stacked.reshape((n_sets, 3) + xi_grid.shape)
+        dx_grid, dy_grid, dz_grid = stacked[:, 0], stacked[:, 1], stacked[:, 2]
+        tilt_x, tilt_y = self.calculate_tilt(dz_grid, xi_grid, yi_grid)
+        curvature_x, curvature_y = self.calculate_curvature(dz_grid, xi_grid, yi_grid)
+        strain_x, strain_y, shear_strain = self.calculate_horizontal_strain(dx_grid, dy_grid, xi_grid, yi_grid)
+        fields = {
+            'dx_grid': dx_grid, 'dy_grid': dy_grid, 'dz_grid': dz_grid,
+            'tilt_x': tilt_x, 'tilt_y': tilt_y,
+            'curvature_x': curvature_x, 'curvature_y': curvature_y,
+            'strain_x': strain_x, 'strain_y': strain_y, 'shear_strain': shear_strain,
+        }
+        difference = {}
+        ratio = {}
+        for name, field in fields.items():
+            base = field[:1]
+            difference[name] = field[1:] - base
+            with np.errstate(divide='ignore', invalid='ignore'):
+                small = np.abs(base) < ratio_threshold * np.nanmax(np.abs(base))
+                ratio[name] = np.where(small, np.nan, field[1:] / base)
+        return {
+            'xi_grid': xi_grid, 'yi_grid': yi_grid, 'mask': mask,
+            'fields': fields, 'difference': difference, 'ratio': ratio,
+        }
+
+    @staticmethod
+    def comparison_statistics(comparison, labels):
+        """各字段在有效单元上的最小/最大/均值/最大绝对值，方案、差值与比值逐行列出"""
+        if len(set(labels)) < len(labels):
+            raise ValueError(f"方案名称重复：{labels}")
+        mask = comparison['mask']
+        rows = []
+        for name, field in comparison['fields'].items():
+            groups = [(labels, field),
+                      ([f'{label}-{labels[0]}' for label in labels[1:]], comparison['difference'][name]),
+                      ([f'{label}/{labels[0]}' for label in labels[1:]], comparison['ratio'][name])]
+            for group_labels, stack in groups:
+                valid = stack[:, mask]
+                with np.errstate(invalid='ignore'):
+                    stats = np.array([np.nanmin(valid, axis=1), np.nanmax(valid, axis=1),
+                                      np.nanmean(valid, axis=1), np.nanmax(np.abs(valid), axis=1)])
+                for label, column in zip(group_labels, stats.T):
+                    rows.append([name, label, *column])
+        return pd.DataFrame(rows, columns=['字段', '方案', '最小值', '最大值', '均值', '最大绝对值'])
+
+    def sample_points(self, px, py, fields=None, step=None, method=None):
+        """在任意测点处直接由散点插值取值，返回{字段名: 数组}；派生字段按间距step（默认同插值网格）中心差分"""
+        if fields is None:
+            fields = DISPLACEMENT_FIELDS + DERIVED_FIELDS
+        if method is None:
+            method = config.INTERPOLATION_METHOD
+        if step is None:
+            step = max(np.ptp(self.x), np.ptp(self.y)) / (config.GRID_RESOLUTION - 1)
+        px = np.asarray(px, dtype=float)
+        py = np.asarray(py, dtype=float)
+        if method not in self._query_interpolators:
+            # 三个位移分量共用一个插值器，一次求值得到(..., 3)
+            self._query_interpolators[method] = self._make_interpolator(
+                np.column_stack([self.dx, self.dy, self.dz]), method)
+        interp = self._query_interpolators[method]
+        if all(name in DISPLACEMENT_FIELDS for name in fields):
+            qx, qy = px, py
+        else:
+            # 模板点顺序：中心、x±h、y±h、x±2h、y±2h，全部测点一次批量求值
+            offsets = (np.array([0, 1, -1, 0, 0, 2, -2, 0, 0]) * step,
+                       np.array([0, 0, 0, 1, -1, 0, 0, 2, -2]) * step)
+            qx = px[np.newaxis] + offsets[0].reshape((-1,) + (1,) * px.ndim)
+            qy = py[np.newaxis] + offsets[1].reshape((-1,) + (1,) * py.ndim)
+        # 与插值网格使用同一掩膜：凸包外或远离节点的测点及模板点不插值，取NaN
+        valid = self.create_validity_mask(np.column_stack([qx.ravel(), qy.ravel()]), method).reshape(qx.shape)
+        values = np.full(qx.shape + (3,), np.nan)
+        values[valid] = interp(qx[valid], qy[valid])
+        if all(name in DISPLACEMENT_FIELDS for name in fields):
+            c = values
+        else:
+            c, xp, xm, yp, ym, xp2, xm2, yp2, ym2 = values
+        d = self._stencil_derivative
+        result = {}
+        for name in fields:
+            if name in DISPLACEMENT_FIELDS:
+                result[name] = c[..., DISPLACEMENT_FIELDS.index(name)]
+            elif name == 'tilt_x':
+                result[name] = d(xp[..., 2], c[..., 2], xm[..., 2], step)
+            elif name == 'tilt_y':
+                result[name] = d(yp[..., 2], c[..., 2], ym[..., 2], step)
+            elif name == 'curvature_x':
+                # 与calculate_curvature一致：先在x±h和中心处求倾斜，再对倾斜求导
+                result[name] = d(d(xp2[..., 2], xp[..., 2], c[..., 2], step), d(xp[..., 2], c[..., 2], xm[..., 2], step),
+                                 d(c[..., 2], xm[..., 2], xm2[..., 2], step), step)
+            elif name == 'curvature_y':
+                result[name] = d(d(yp2[..., 2], yp[..., 2], c[..., 2], step), d(yp[..., 2], c[..., 2], ym[..., 2], step),
+                                 d(c[..., 2], ym[..., 2], ym2[..., 2], step), step)
+            elif name == 'strain_x':
+                result[name] = d(xp[..., 0], c[..., 0], xm[..., 0], step)
+            elif name == 'strain_y':
+                result[name] = d(yp[..., 1], c[..., 1], ym[..., 1], step)
+            elif name == 'shear_strain':
+                result[name] = (d(yp[..., 0], c[..., 0], ym[..., 0], step) + d(xp[..., 1], c[..., 1], xm[..., 1], step)) / 2
+            else:
+                raise ValueError(f"未知的查询字段: {name}")
+        return result
+
+    def sample_profile(self, polyline, num=200, fields=None, step=None, method=None):
+        """沿折线剖面等距取num个点采样，结果额外包含distance、x、y"""
+        polyline = np.asarray(polyline, dtype=float)
+        seg_len = np.hypot(*np.diff(polyline, axis=0).T)
+        cum_len = np.concatenate([[0], np.cumsum(seg_len)])
+        distance = np.linspace(0, cum_len[-1], num)
+        px = np.interp(distance, cum_len, polyline[:, 0])
+        py = np.interp(distance, cum_len, polyline[:, 1])
+        result = self.sample_points(px, py, fields, step, method)
+        result.update({'distance': distance, 'x': px, 'y': py})
+        return result
+
     def get_statistics(self):
         stats = {
             '节点数量': len(self.data),
@@ -0,0 +1,124 @@
+import os
+import sys
+import uuid
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import config
+from src.data_processor import DataProcessor
+from src.visualization import Visualizer, FIELD_LABELS
+
+# 工作进程内按渲染方式缓存的可视化器，复用figure模板
+_visualizers = {}
+
+
+def _report(progress, job_id, fraction, stage):
+    progress[job_id] = (fraction, stage)
+
+
+def preprocess_job(job_id, progress, data_path, grid_res, interp_method):
+    """后台数据预处理：加载、三向插值及倾斜/曲率/水平变形计算，失败时返回None"""
+    config.INPUT_PATH = data_path
+    config.GRID_RESOLUTION = grid_res
+    config.INTERPOLATION_METHOD = interp_method
+    _report(progress, job_id, 0.0, "加载数据")
+    processor = DataProcessor()
+    if not processor.load_data():
+        _report(progress, job_id, 1.0, "数据加载失败")
+        return None
+    return processor.compute_fields(lambda fraction, stage: _report(progress, job_id, fraction, stage))
+
+
+def comparison_job(job_id, progress, data_paths, labels, grid_res, interp_method, field, mode, results_dir, render_mode):
+    """后台多方案对比：共用网格一次插值全部方案，输出统计表及并排云图和差值/比值云图（mode为'difference'或'ratio'）路径"""
+    config.GRID_RESOLUTION = grid_res
+    config.INTERPOLATION_METHOD = interp_method
+    config.RESULTS_DIR = results_dir
+    _report(progress, job_id, 0.0, "加载各方案数据")
+    processor = DataProcessor()
+    displacements = processor.load_comparison(data_paths)
+    _report(progress, job_id, 0.3, "插值并计算对比字段")
+    comparison = processor.compute_comparison_fields(displacements)
+    statistics = processor.comparison_statistics(comparison, labels)
+    if render_mode not in _visualizers:
+        _visualizers[render_mode] = Visualizer(render_mode=render_mode)
+    visualizer = _visualizers[render_mode]
+    xi_grid, yi_grid = comparison['xi_grid'], comparison['yi_grid']
+    _report(progress, job_id, 0.6, "绘制方案对比云图")
+    visualizer.plot_comparison(xi_grid, yi_grid, comparison['fields'][field], labels, field, f'compare_{field}')
+    images = [os.path.join(results_dir, f'compare_{field}.png')]
+    if len(labels) > 1 and mode == 'difference':
+        _report(progress, job_id, 0.8, "绘制差值云图")
+        diff_labels = [f'{label}-{labels[0]}' for label in labels[1:]]
+        visualizer.plot_comparison(xi_grid, yi_grid, comparison['difference'][field], diff_labels, field,
+                                   f'compare_{field}_diff', cmap='RdBu_r', symmetric=True)
+        images.append(os.path.join(results_dir, f'compare_{field}_diff.png'))
+    elif len(labels) > 1 and mode == 'ratio':
+        _report(progress, job_id, 0.8, "绘制比值云图")
+        ratio = comparison['ratio'][field]
+        values = processor.valid_values(comparison['mask'], *ratio)
+        if values.size:
+            # 基准接近零处比值仍可能很大，色阶取1%~99%分位数并以1为中心
+            half = float(np.max(np.abs(np.percentile(values, [1, 99]) - 1)))
+            ratio_labels = [f'{label}/{labels[0]}' for label in labels[1:]]
+            visualizer.plot_comparison(xi_grid, yi_grid, ratio, ratio_labels, field, f'compare_{field}_ratio',
+                                       cmap='RdBu_r', vmin=1 - half, vmax=1 + half,
+                                       cbar_label=f'{FIELD_LABELS[field][0]}比值')
+            images.append(os.path.join(results_dir, f'compare_{field}_ratio.png'))
+    _report(progress, job_id, 1.0, "完成")
+    return {'statistics': statistics, 'images': images}
+
+
+def render_job(job_id, progress, plot_name, filename, args, kwargs, results_dir, render_mode):
+    """后台出图：调用Visualizer的plot_*方法，返回PNG路径"""
+    config.RESULTS_DIR = results_dir
+    _report(progress, job_id, 0.1, "绘图中")
+    if render_mode not in _visualizers:
+        _visualizers[render_mode] = Visualizer(render_mode=render_mode)
+    getattr(_visualizers[render_mode], plot_name)(*args, **kwargs)
+    _report(progress, job_id, 1.0, "完成")
+    return os.path.join(results_dir, f'{filename}.png')
+
+
+class JobManager:
+    """进程池任务管理：提交预处理/出图任务，并通过共享字典回报各阶段进度"""
+
+    def __init__(self, max_workers=None):
+        if getattr(sys, 'frozen', False):
+            # PyInstaller打包后子进程会重新执行exe入口（Streamlit脚本没有__main__保护），
+            # 改用单个后台线程；任务会修改config全局变量，串行执行避免相互覆盖
+            self._manager = None
+            self.progress = {}
+            self.executor = ThreadPoolExecutor(max_workers=1)
+        else:
+            # Streamlit服务进程是多线程的，Linux默认fork可能死锁，统一用spawn（与Windows行为一致）
+            context = multiprocessing.get_context('spawn')
+            self._manager = context.Manager()
+            self.progress = self._manager.dict()
+            self.executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+        self.futures = {}
+
+    def submit(self, fn, *args):
+        job_id = uuid.uuid4().hex
+        _report(self.progress, job_id, 0.0, "排队中")
+        self.futures[job_id] = self.executor.submit(fn, job_id, self.progress, *args)
+        return job_id
+
+    def __contains__(self, job_id):
+        return job_id in self.futures
+
+    def status(self, job_id):
+        """返回(是否结束, 进度0~1, 阶段描述)"""
+        fraction, stage = self.progress.get(job_id, (0.0, "排队中"))
+        return self.futures[job_id].done(), fraction, stage
+
+    def result(self, job_id):
+        """取出已结束任务的结果并释放记录，任务内部异常会在此抛出"""
+        future = self.futures.pop(job_id)
+        self.progress.pop(job_id, None)
+        return future.result()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self._manager is not None:
+            self._manager.shutdown()
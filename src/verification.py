@@ -0,0 +1,130 @@
+import os
+import json
+import time
+import numpy as np
+import config
+from src.data_processor import DataProcessor
+
+# 基准用例：合成地表 × 插值方法，网格分辨率固定以保证可复现
+SURFACES = ['rect', 'lshape']
+METHODS = ['linear', 'cubic']
+GRID_RESOLUTION = 60
+DISPLACEMENT_GRIDS = ['dx_grid', 'dy_grid', 'dz_grid']
+DERIVED_GRIDS = ['tilt_x', 'tilt_y', 'curvature_x', 'curvature_y', 'strain_x', 'strain_y', 'shear_strain']
+# (rtol, atol)：派生字段经差分放大了插值误差，容差相应放宽
+TOLERANCES = {'displacement': (1e-9, 1e-9), 'derived': (1e-7, 1e-9)}
+TIMINGS_FILE = 'timings.json'
+
+
+def surface_path(surface):
+    return os.path.join(config.GOLDEN_DIR, f'{surface}_surface_disp.txt')
+
+
+def golden_path(surface, method):
+    return os.path.join(config.GOLDEN_DIR, f'{surface}_{method}.npz')
+
+
+def write_synthetic_surface(surface, path):
+    """生成小型合成FLAC3D地表位移文件：扰动的规则节点上叠加一个沉降盆地（位移单位m）"""
+    rng = np.random.default_rng(2024)
+    xs, ys = np.meshgrid(np.linspace(0, 300, 31), np.linspace(0, 200, 21))
+    x = xs.ravel() + rng.uniform(-2, 2, xs.size)
+    y = ys.ravel() + rng.uniform(-2, 2, ys.size)
+    if surface == 'lshape':
+        keep = ~((x > 150) & (y > 100))
+        x, y = x[keep], y[keep]
+    basin = np.exp(-((x - 120) / 60) ** 2 - ((y - 80) / 40) ** 2)
+    dx = 0.25 * (x - 120) / 60 * basin
+    dy = 0.25 * (y - 80) / 40 * basin
+    dz = -0.8 * basin
+    with open(path, 'w', encoding='utf-8') as f:
+        # 与FLAC3D导出文件一致：首行标题、次行列名（load_data跳过首行并以次行为表头）
+        f.write(f"FLAC3D surface displacement ({surface}, synthetic)\n")
+        f.write("ID X Y Z XDisp YDisp ZDisp\n")
+        for i in range(len(x)):
+            f.write(f"{i + 1} {x[i]:.6f} {y[i]:.6f} 0.0 {dx[i]:.9e} {dy[i]:.9e} {dz[i]:.9e}\n")
+
+
+def run_case(surface, method):
+    """对一个基准用例完整运行DataProcessor，返回(字段字典, 各阶段耗时)"""
+    saved = config.GRID_RESOLUTION, config.INTERPOLATION_METHOD
+    config.GRID_RESOLUTION, config.INTERPOLATION_METHOD = GRID_RESOLUTION, method
+    try:
+        timings = {}
+        start = time.perf_counter()
+        processor = DataProcessor()
+        if not processor.load_data(surface_path(surface)):
+            raise RuntimeError(f"无法加载基准地表：{surface_path(surface)}")
+        timings['加载数据'] = time.perf_counter() - start
+        marks = []
+        fields = processor.compute_fields(lambda fraction, stage: marks.append((stage, time.perf_counter())))
+        for (stage, t0), (_, t1) in zip(marks, marks[1:]):
+            timings[stage] = t1 - t0
+        timings['总计'] = time.perf_counter() - start
+    finally:
+        config.GRID_RESOLUTION, config.INTERPOLATION_METHOD = saved
+    return fields, timings
+
+
+def compare_fields(fields, golden, tolerances=None):
+    """逐字段比较：NaN分布须一致，有限值在容差内；返回[(字段, 是否通过, 最大绝对误差)]"""
+    if tolerances is None:
+        tolerances = TOLERANCES
+    results = []
+    for name in ['xi_grid', 'yi_grid', 'mask'] + DISPLACEMENT_GRIDS + DERIVED_GRIDS:
+        actual, expected = np.asarray(fields[name]), golden[name]
+        if actual.shape != expected.shape:
+            results.append((name, False, np.inf))
+            continue
+        if name == 'mask':
+            results.append((name, bool(np.array_equal(actual, expected)), float(np.sum(actual != expected))))
+            continue
+        rtol, atol = tolerances['derived' if name in DERIVED_GRIDS else 'displacement']
+        finite = np.isfinite(expected)
+        if not np.array_equal(np.isfinite(actual), finite):
+            results.append((name, False, np.inf))
+            continue
+        err = np.abs(actual[finite] - expected[finite])
+        ok = bool(np.all(err <= atol + rtol * np.abs(expected[finite])))
+        results.append((name, ok, float(err.max()) if err.size else 0.0))
+    return results
+
+
+def update_golden():
+    """重新生成基准：缺失的合成地表文件、各用例字段数组及参考耗时"""
+    os.makedirs(config.GOLDEN_DIR, exist_ok=True)
+    timings = {}
+    for surface in SURFACES:
+        if not os.path.exists(surface_path(surface)):
+            write_synthetic_surface(surface, surface_path(surface))
+        for method in METHODS:
+            fields, case_timings = run_case(surface, method)
+            np.savez_compressed(golden_path(surface, method), **fields)
+            timings[f'{surface}_{method}'] = case_timings
+            print(f"已保存：{golden_path(surface, method)}")
+    with open(os.path.join(config.GOLDEN_DIR, TIMINGS_FILE), 'w', encoding='utf-8') as f:
+        json.dump(timings, f, ensure_ascii=False, indent=2)
+
+
+def verify(tolerances=None):
+    """用当前实现重跑全部用例并与基准比较，打印误差和耗时对比，全部通过返回True"""
+    timings_path = os.path.join(config.GOLDEN_DIR, TIMINGS_FILE)
+    reference = {}
+    if os.path.exists(timings_path):
+        with open(timings_path, 'r', encoding='utf-8') as f:
+            reference = json.load(f)
+    all_ok = True
+    for surface in SURFACES:
+        for method in METHODS:
+            case = f'{surface}_{method}'
+            fields, timings = run_case(surface, method)
+            with np.load(golden_path(surface, method)) as golden:
+                results = compare_fields(fields, golden, tolerances)
+            failed = [(name, err) for name, ok, err in results if not ok]
+            all_ok = all_ok and not failed
+            ref_total = reference.get(case, {}).get('总计')
+            speed = f"，基准 {ref_total:.3f}s" if ref_total else ""
+            print(f"[{'通过' if not failed else '失败'}] {case}：耗时 {timings['总计']:.3f}s{speed}")
+            for name, err in failed:
+                print(f"    {name} 超出容差，最大绝对误差 {err:.3e}")
+    return all_ok
@@ -1,6 +1,9 @@
 import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.colors import BoundaryNorm
+from matplotlib.cm import ScalarMappable
 import numpy as np
 import os
 import config
@@ -11,10 +14,152 @@ import matplotlib.font_manager as fm
 font_path = os.path.join(os.path.dirname(__file__), '..', 'fonts', 'msyh.ttc')
 my_font = fm.FontProperties(fname=font_path)
 
+# 各网格字段的显示名称与单位
+FIELD_LABELS = {
+    'dx_grid': ('X方向位移', 'mm'), 'dy_grid': ('Y方向位移', 'mm'), 'dz_grid': ('Z方向位移', 'mm'),
+    'tilt_x': ('X方向倾斜', 'mm/m'), 'tilt_y': ('Y方向倾斜', 'mm/m'),
+    'curvature_x': ('X方向曲率', '10^-3/m'), 'curvature_y': ('Y方向曲率', '10^-3/m'),
+    'strain_x': ('X方向水平变形', 'mm/m'), 'strain_y': ('Y方向水平变形', 'mm/m'), 'shear_strain': ('剪切变形', 'mm/m'),
+}
+
+
+class FigureTemplate:
+    """可复用的多子图模板：保留figure、坐标轴、色条轴和标签文本，换数据时只替换等值线对象"""
+
+    def __init__(self, ncols, figsize):
+        # 不经过pyplot注册，模板释放后figure可被正常回收
+        self.fig = Figure(figsize=figsize, dpi=config.DPI)
+        self.axes = list(np.atleast_1d(self.fig.subplots(1, ncols)))
+        self.caxes = []
+        self.titles = []
+        self.artists = [[] for _ in self.axes]
+        for ax in self.axes:
+            ax.set_xlabel('X 坐标 (m)', fontproperties=my_font)
+            ax.set_ylabel('Y 坐标 (m)', fontproperties=my_font)
+            self.titles.append(ax.set_title('', fontproperties=my_font))
+            ax.set_aspect('equal')
+            divider = make_axes_locatable(ax)
+            self.caxes.append(divider.append_axes("right", size="5%", pad=0.1))
+        # image渲染方式下的着色图像，保存时按输出格式切换插值方式
+        self.images = []
+        # 初始子图参数，save中的tight_layout会改动，每轮绘制前恢复
+        self.subplotpars = {name: getattr(self.fig.subplotpars, name)
+                            for name in ('left', 'right', 'bottom', 'top', 'wspace', 'hspace')}
+
+    def clear_panel(self, i):
+        """移除第i个子图上一轮绘制的等值线及标注"""
+        for artist in self.artists[i]:
+            artist.remove()
+            if artist in self.images:
+                self.images.remove(artist)
+        self.artists[i] = []
+        self.caxes[i].cla()
+
+    def reset_layout(self, xi, yi):
+        """清空全部子图并按初始布局和当前网格范围重新排版；clabel按当前坐标变换放置标注，先排版使复用模板与新建figure出图一致"""
+        self.fig.subplots_adjust(**self.subplotpars)
+        for i, ax in enumerate(self.axes):
+            self.clear_panel(i)
+            ax.set_xlim(np.nanmin(xi), np.nanmax(xi))
+            ax.set_ylim(np.nanmin(yi), np.nanmax(yi))
+        self.fig.draw_without_rendering()
+
+    def draw_panel(self, i, xi, yi, zi, levels, ticks, title, cbar_label, cmap,
+                   vmin=None, vmax=None, contour_lines=10, line_color='black', render_mode='contour'):
+        self.clear_panel(i)
+        ax = self.axes[i]
+        # 无效单元（凸包外/远离节点）以掩膜形式传入，绘图时直接跳过
+        zi = np.ma.masked_invalid(zi)
+        if render_mode == 'image':
+            # 规则网格直接按像素着色，BoundaryNorm分级后与contourf的色带效果一致；
+            # 在源网格上一次完成分级着色，避免Agg在输出DPI的每个像素上重复做norm
+            cmap_obj = plt.get_cmap(cmap)
+            norm = BoundaryNorm(levels, cmap_obj.N, extend='both')
+            half_x = (xi[0, -1] - xi[0, 0]) / max(xi.shape[1] - 1, 1) / 2
+            half_y = (yi[-1, 0] - yi[0, 0]) / max(yi.shape[0] - 1, 1) / 2
+            extent = [xi[0, 0] - half_x, xi[0, -1] + half_x, yi[0, 0] - half_y, yi[-1, 0] + half_y]
+            image = ax.imshow(cmap_obj(norm(zi), bytes=True), origin='lower', extent=extent,
+                              interpolation='nearest', aspect='equal')
+            self.images.append(image)
+            fill = image
+            contour = ScalarMappable(norm=norm, cmap=cmap_obj)
+        elif render_mode == 'contour':
+            contour = ax.contourf(xi, yi, zi, levels=levels, cmap=cmap, vmin=vmin, vmax=vmax, extend='both')
+            fill = contour
+        else:
+            raise ValueError(f"未知的渲染方式: {render_mode}")
+        contour_lines_obj = ax.contour(xi, yi, zi, levels=contour_lines, colors=line_color, linewidths=0.5, alpha=0.7)
+        if line_color == 'black':
+            ax.clabel(contour_lines_obj, inline=True, fontsize=8)
+        else:
+            ax.clabel(contour_lines_obj, inline=True, fontsize=8, colors=line_color)
+        self.artists[i] = [fill, contour_lines_obj]
+        self.titles[i].set_text(title)
+        cbar = self.fig.colorbar(contour, cax=self.caxes[i], ticks=ticks, extendfrac=0)
+        if render_mode == 'image':
+            # BoundaryNorm色条默认在每个分级边界加次刻度，与contourf色条不一致且绘制开销大
+            cbar.minorticks_off()
+        cbar.set_label(cbar_label, fontproperties=my_font)
+
+    def save(self, filename):
+        # 每次换数据后刻度和色条标签宽度都可能变化，布局需重新计算
+        if len(self.axes) > 1:
+            self.fig.tight_layout()
+        for fmt in config.SAVE_FORMATS:
+            # 矢量格式直接嵌入源网格像素（'none'），位图格式用最近邻放大
+            for image in self.images:
+                image.set_interpolation('none' if fmt in ('pdf', 'svg', 'eps', 'ps') else 'nearest')
+            save_path = os.path.join(config.RESULTS_DIR, f'{filename}.{fmt}')
+            self.fig.savefig(save_path, dpi=config.DPI, bbox_inches='tight')
+            print(f"已保存：{save_path}")
+
+
 class Visualizer:
-    def __init__(self):
+    def __init__(self, render_mode=None):
         plt.rcParams['axes.unicode_minus'] = False
         plt.rcParams['mathtext.fontset'] = 'stix'
+        # 'contour'为contourf填充，'image'为imshow分级着色并仅叠加标注等高线
+        self.render_mode = render_mode if render_mode is not None else config.RENDER_MODE
+        # 按(子图数, 图幅)缓存的figure模板，批量出图时复用
+        self.templates = {}
+
+    def get_template(self, ncols, figsize):
+        key = (ncols, tuple(figsize))
+        if key not in self.templates:
+            self.templates[key] = FigureTemplate(ncols, figsize)
+        return self.templates[key]
+
+    def close(self):
+        """释放所有缓存的figure模板"""
+        self.templates.clear()
+
+    def _resolve_levels(self, zi, levels=None, vmin=None, vmax=None):
+        """根据色阶范围、levels参数或config.CONTOUR_LEVELS计算填充等级和色条刻度"""
+        if vmin is not None and vmax is not None:
+            N = config.CONTOUR_LEVELS if isinstance(config.CONTOUR_LEVELS, int) else len(config.CONTOUR_LEVELS)
+            return np.linspace(vmin, vmax, N), list(np.linspace(vmin, vmax, min(N, 6)))
+        if levels is None:
+            levels = config.CONTOUR_LEVELS
+        if isinstance(levels, int):
+            N = levels
+            # 自动取数据范围
+            zmin, zmax = np.nanmin(zi), np.nanmax(zi)
+            return np.linspace(zmin, zmax, N), list(np.linspace(zmin, zmax, min(N, 6)))
+        levels = np.array(levels)
+        N = len(levels)
+        return levels, list(np.linspace(np.min(levels), np.max(levels), min(N, 6)))
+
+    def _plot_panels(self, xi, yi, panels, filename, figsize, cmap, levels=None, vmin=None, vmax=None,
+                     contour_lines=10, line_color='black'):
+        """panels为(数据, 子图标题, 色条标签)列表，逐个子图绘制后保存"""
+        template = self.get_template(len(panels), figsize)
+        template.reset_layout(xi, yi)
+        for i, (zi, title, cbar_label) in enumerate(panels):
+            panel_levels, ticks = self._resolve_levels(zi, levels, vmin, vmax)
+            template.draw_panel(i, xi, yi, zi, panel_levels, ticks, title, cbar_label, cmap,
+                                vmin=vmin, vmax=vmax, contour_lines=contour_lines, line_color=line_color,
+                                render_mode=self.render_mode)
+        template.save(filename)
 
     def plot_displacement_contour(self, xi, yi, zi, title, filename, displacement_type='位移', unit='mm',
                                  levels=None, vmin=None, vmax=None, contour_lines=10):
@@ -24,276 +169,46 @@ class Visualizer:
             raise TypeError(f"config.CONTOUR_LEVELS 类型错误: {type(config.CONTOUR_LEVELS)}")
         if not (isinstance(contour_lines, int) or isinstance(contour_lines, (list, np.ndarray))):
             raise TypeError(f"contour_lines 类型错误: {type(contour_lines)}")
-        if vmin is not None and vmax is not None:
-            N = config.CONTOUR_LEVELS if isinstance(config.CONTOUR_LEVELS, int) else len(config.CONTOUR_LEVELS)
-            levels = np.linspace(vmin, vmax, N)
-            ticks = list(np.linspace(vmin, vmax, min(N, 6)))
-        else:
-            if levels is None:
-                if isinstance(config.CONTOUR_LEVELS, int):
-                    N = config.CONTOUR_LEVELS
-                    # 自动取数据范围
-                    zmin, zmax = np.nanmin(zi), np.nanmax(zi)
-                    levels = np.linspace(zmin, zmax, N)
-                    ticks = list(np.linspace(zmin, zmax, min(N, 6)))
-                else:
-                    levels = np.array(config.CONTOUR_LEVELS)
-                    N = len(levels)
-                    ticks = list(np.linspace(np.min(levels), np.max(levels), min(N, 6)))
-            else:
-                if isinstance(levels, int):
-                    N = levels
-                    zmin, zmax = np.nanmin(zi), np.nanmax(zi)
-                    levels = np.linspace(zmin, zmax, N)
-                    ticks = list(np.linspace(zmin, zmax, min(N, 6)))
-                else:
-                    levels = np.array(levels)
-                    N = len(levels)
-                    ticks = list(np.linspace(np.min(levels), np.max(levels), min(N, 6)))
-        fig, ax = plt.subplots(figsize=config.FIGURE_SIZE, dpi=config.DPI)
-        contour = ax.contourf(xi, yi, zi, levels=levels, cmap=config.COLORMAP, vmin=vmin, vmax=vmax, extend='both')
-        contour_lines_obj = ax.contour(xi, yi, zi, levels=contour_lines, colors='black', linewidths=0.5, alpha=0.7)
-        ax.clabel(contour_lines_obj, inline=True, fontsize=8)
-        ax.set_xlabel('X 坐标 (m)', fontproperties=my_font)
-        ax.set_ylabel('Y 坐标 (m)', fontproperties=my_font)
-        ax.set_title(f'地表{displacement_type}云图 - {title}', fontproperties=my_font)
-        ax.set_aspect('equal')
-        divider = make_axes_locatable(ax)
-        cax = divider.append_axes("right", size="5%", pad=0.1)
-        cbar = plt.colorbar(contour, cax=cax, ticks=ticks, extendfrac=0)
-        cbar.set_label(f'{displacement_type} ({unit})', fontproperties=my_font)
-        for fmt in config.SAVE_FORMATS:
-            save_path = os.path.join(config.RESULTS_DIR, f'{filename}.{fmt}')
-            plt.savefig(save_path, dpi=config.DPI, bbox_inches='tight')
-            print(f"已保存：{save_path}")
-        plt.close(fig)
+        panels = [(zi, f'地表{displacement_type}云图 - {title}', f'{displacement_type} ({unit})')]
+        self._plot_panels(xi, yi, panels, filename, config.FIGURE_SIZE, config.COLORMAP,
+                          levels, vmin, vmax, contour_lines)
 
     def plot_tilt_contour(self, xi, yi, tilt_x, tilt_y, filename,
                          levels=None, vmin=None, vmax=None, contour_lines=10):
-        if vmin is not None and vmax is not None:
-            N = config.CONTOUR_LEVELS if isinstance(config.CONTOUR_LEVELS, int) else len(config.CONTOUR_LEVELS)
-            levels1 = np.linspace(vmin, vmax, N)
-            levels2 = np.linspace(vmin, vmax, N)
-            ticks1 = list(np.linspace(vmin, vmax, min(N, 6)))
-            ticks2 = list(np.linspace(vmin, vmax, min(N, 6)))
-        else:
-            if levels is None:
-                if isinstance(config.CONTOUR_LEVELS, int):
-                    N = config.CONTOUR_LEVELS
-                    # 自动取数据范围
-                    tilt_x_min, tilt_x_max = np.nanmin(tilt_x), np.nanmax(tilt_x)
-                    tilt_y_min, tilt_y_max = np.nanmin(tilt_y), np.nanmax(tilt_y)
-                    levels1 = np.linspace(tilt_x_min, tilt_x_max, N)
-                    levels2 = np.linspace(tilt_y_min, tilt_y_max, N)
-                    ticks1 = list(np.linspace(tilt_x_min, tilt_x_max, min(N, 6)))
-                    ticks2 = list(np.linspace(tilt_y_min, tilt_y_max, min(N, 6)))
-                else:
-                    levels1 = np.array(config.CONTOUR_LEVELS)
-                    levels2 = np.array(config.CONTOUR_LEVELS)
-                    ticks1 = list(np.linspace(np.min(levels1), np.max(levels1), min(len(levels1), 6)))
-                    ticks2 = list(np.linspace(np.min(levels2), np.max(levels2), min(len(levels2), 6)))
-            else:
-                if isinstance(levels, int):
-                    N = levels
-                    # 自动取数据范围
-                    tilt_x_min, tilt_x_max = np.nanmin(tilt_x), np.nanmax(tilt_x)
-                    tilt_y_min, tilt_y_max = np.nanmin(tilt_y), np.nanmax(tilt_y)
-                    levels1 = np.linspace(tilt_x_min, tilt_x_max, N)
-                    levels2 = np.linspace(tilt_y_min, tilt_y_max, N)
-                    ticks1 = list(np.linspace(tilt_x_min, tilt_x_max, min(N, 6)))
-                    ticks2 = list(np.linspace(tilt_y_min, tilt_y_max, min(N, 6)))
-                else:
-                    levels1 = np.array(levels)
-                    levels2 = np.array(levels)
-                    ticks1 = list(np.linspace(np.min(levels1), np.max(levels1), min(len(levels1), 6)))
-                    ticks2 = list(np.linspace(np.min(levels2), np.max(levels2), min(len(levels2), 6)))
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6), dpi=config.DPI)
-        contour1 = ax1.contourf(xi, yi, tilt_x, levels=levels1, cmap='RdBu_r', vmin=vmin, vmax=vmax, extend='both')
-        contour_lines1 = ax1.contour(xi, yi, tilt_x, levels=contour_lines, colors='black', linewidths=0.5, alpha=0.7)
-        ax1.clabel(contour_lines1, inline=True, fontsize=8)
-        ax1.set_xlabel('X 坐标 (m)', fontproperties=my_font)
-        ax1.set_ylabel('Y 坐标 (m)', fontproperties=my_font)
-        ax1.set_title('X方向倾斜变形', fontproperties=my_font)
-        ax1.set_aspect('equal')
-        divider1 = make_axes_locatable(ax1)
-        cax1 = divider1.append_axes("right", size="5%", pad=0.1)
-        cbar1 = plt.colorbar(contour1, cax=cax1, ticks=ticks1, extendfrac=0)
-        cbar1.set_label('X方向倾斜 (mm/m)', fontproperties=my_font)
-        contour2 = ax2.contourf(xi, yi, tilt_y, levels=levels2, cmap='RdBu_r', vmin=vmin, vmax=vmax, extend='both')
-        contour_lines2 = ax2.contour(xi, yi, tilt_y, levels=contour_lines, colors='black', linewidths=0.5, alpha=0.7)
-        ax2.clabel(contour_lines2, inline=True, fontsize=8)
-        ax2.set_xlabel('X 坐标 (m)', fontproperties=my_font)
-        ax2.set_ylabel('Y 坐标 (m)', fontproperties=my_font)
-        ax2.set_title('Y方向倾斜变形', fontproperties=my_font)
-        ax2.set_aspect('equal')
-        divider2 = make_axes_locatable(ax2)
-        cax2 = divider2.append_axes("right", size="5%", pad=0.1)
-        cbar2 = plt.colorbar(contour2, cax=cax2, ticks=ticks2, extendfrac=0)
-        cbar2.set_label('Y方向倾斜 (mm/m)', fontproperties=my_font)
-        plt.tight_layout()
-        for fmt in config.SAVE_FORMATS:
-            save_path = os.path.join(config.RESULTS_DIR, f'{filename}.{fmt}')
-            plt.savefig(save_path, dpi=config.DPI, bbox_inches='tight')
-            print(f"已保存：{save_path}")
-        plt.close(fig)
+        panels = [(tilt_x, 'X方向倾斜变形', 'X方向倾斜 (mm/m)'),
+                  (tilt_y, 'Y方向倾斜变形', 'Y方向倾斜 (mm/m)')]
+        self._plot_panels(xi, yi, panels, filename, (16, 6), 'RdBu_r',
+                          levels, vmin, vmax, contour_lines)
 
     def plot_curvature_contour(self, xi, yi, curvature_x, curvature_y, filename,
                               levels=None, vmin=None, vmax=None, contour_lines=10):
-        if vmin is not None and vmax is not None:
-            N = config.CONTOUR_LEVELS if isinstance(config.CONTOUR_LEVELS, int) else len(config.CONTOUR_LEVELS)
-            levels1 = np.linspace(vmin, vmax, N)
-            levels2 = np.linspace(vmin, vmax, N)
-            ticks1 = list(np.linspace(vmin, vmax, min(N, 6)))
-            ticks2 = list(np.linspace(vmin, vmax, min(N, 6)))
-        else:
-            if levels is None:
-                if isinstance(config.CONTOUR_LEVELS, int):
-                    N = config.CONTOUR_LEVELS
-                    # 自动取数据范围
-                    curvature_x_min, curvature_x_max = np.nanmin(curvature_x), np.nanmax(curvature_x)
-                    curvature_y_min, curvature_y_max = np.nanmin(curvature_y), np.nanmax(curvature_y)
-                    levels1 = np.linspace(curvature_x_min, curvature_x_max, N)
-                    levels2 = np.linspace(curvature_y_min, curvature_y_max, N)
-                    ticks1 = list(np.linspace(curvature_x_min, curvature_x_max, min(N, 6)))
-                    ticks2 = list(np.linspace(curvature_y_min, curvature_y_max, min(N, 6)))
-                else:
-                    levels1 = np.array(config.CONTOUR_LEVELS)
-                    levels2 = np.array(config.CONTOUR_LEVELS)
-                    ticks1 = list(np.linspace(np.min(levels1), np.max(levels1), min(len(levels1), 6)))
-                    ticks2 = list(np.linspace(np.min(levels2), np.max(levels2), min(len(levels2), 6)))
-            else:
-                if isinstance(levels, int):
-                    N = levels
-                    # 自动取数据范围
-                    curvature_x_min, curvature_x_max = np.nanmin(curvature_x), np.nanmax(curvature_x)
-                    curvature_y_min, curvature_y_max = np.nanmin(curvature_y), np.nanmax(curvature_y)
-                    levels1 = np.linspace(curvature_x_min, curvature_x_max, N)
-                    levels2 = np.linspace(curvature_y_min, curvature_y_max, N)
-                    ticks1 = list(np.linspace(curvature_x_min, curvature_x_max, min(N, 6)))
-                    ticks2 = list(np.linspace(curvature_y_min, curvature_y_max, min(N, 6)))
-                else:
-                    levels1 = np.array(levels)
-                    levels2 = np.array(levels)
-                    ticks1 = list(np.linspace(np.min(levels1), np.max(levels1), min(len(levels1), 6)))
-                    ticks2 = list(np.linspace(np.min(levels2), np.max(levels2), min(len(levels2), 6)))
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6), dpi=config.DPI)
-        contour1 = ax1.contourf(xi, yi, curvature_x, levels=levels1, cmap='viridis', vmin=vmin, vmax=vmax, extend='both')
-        contour_lines1 = ax1.contour(xi, yi, curvature_x, levels=contour_lines, colors='white', linewidths=0.5, alpha=0.7)
-        ax1.clabel(contour_lines1, inline=True, fontsize=8, colors='white')
-        ax1.set_xlabel('X 坐标 (m)', fontproperties=my_font)
-        ax1.set_ylabel('Y 坐标 (m)', fontproperties=my_font)
-        ax1.set_title('X方向曲率', fontproperties=my_font)
-        ax1.set_aspect('equal')
-        divider1 = make_axes_locatable(ax1)
-        cax1 = divider1.append_axes("right", size="5%", pad=0.1)
-        cbar1 = plt.colorbar(contour1, cax=cax1, ticks=ticks1, extendfrac=0)
-        cbar1.set_label('X方向曲率 (10^-3/m)', fontproperties=my_font)
-        contour2 = ax2.contourf(xi, yi, curvature_y, levels=levels2, cmap='viridis', vmin=vmin, vmax=vmax, extend='both')
-        contour_lines2 = ax2.contour(xi, yi, curvature_y, levels=contour_lines, colors='white', linewidths=0.5, alpha=0.7)
-        ax2.clabel(contour_lines2, inline=True, fontsize=8, colors='white')
-        ax2.set_xlabel('X 坐标 (m)', fontproperties=my_font)
-        ax2.set_ylabel('Y 坐标 (m)', fontproperties=my_font)
-        ax2.set_title('Y方向曲率', fontproperties=my_font)
-        ax2.set_aspect('equal')
-        divider2 = make_axes_locatable(ax2)
-        cax2 = divider2.append_axes("right", size="5%", pad=0.1)
-        cbar2 = plt.colorbar(contour2, cax=cax2, ticks=ticks2, extendfrac=0)
-        cbar2.set_label('Y方向曲率 (10^-3/m)', fontproperties=my_font)
-        plt.tight_layout()
-        for fmt in config.SAVE_FORMATS:
-            save_path = os.path.join(config.RESULTS_DIR, f'{filename}.{fmt}')
-            plt.savefig(save_path, dpi=config.DPI, bbox_inches='tight')
-            print(f"已保存：{save_path}")
-        plt.close(fig)
+        panels = [(curvature_x, 'X方向曲率', 'X方向曲率 (10^-3/m)'),
+                  (curvature_y, 'Y方向曲率', 'Y方向曲率 (10^-3/m)')]
+        self._plot_panels(xi, yi, panels, filename, (16, 6), 'viridis',
+                          levels, vmin, vmax, contour_lines, line_color='white')
 
     def plot_strain_contour(self, xi, yi, strain_x, strain_y, shear_strain, filename,
                             levels=None, vmin=None, vmax=None, contour_lines=10):
-        if vmin is not None and vmax is not None:
-            N = config.CONTOUR_LEVELS if isinstance(config.CONTOUR_LEVELS, int) else len(config.CONTOUR_LEVELS)
-            levels1 = np.linspace(vmin, vmax, N)
-            levels2 = np.linspace(vmin, vmax, N)
-            levels3 = np.linspace(vmin, vmax, N)
-            ticks1 = list(np.linspace(vmin, vmax, min(N, 6)))
-            ticks2 = list(np.linspace(vmin, vmax, min(N, 6)))
-            ticks3 = list(np.linspace(vmin, vmax, min(N, 6)))
-        else:
-            if levels is None:
-                if isinstance(config.CONTOUR_LEVELS, int):
-                    N = config.CONTOUR_LEVELS
-                    # 自动取数据范围
-                    strain_x_min, strain_x_max = np.nanmin(strain_x), np.nanmax(strain_x)
-                    strain_y_min, strain_y_max = np.nanmin(strain_y), np.nanmax(strain_y)
-                    shear_strain_min, shear_strain_max = np.nanmin(shear_strain), np.nanmax(shear_strain)
-                    levels1 = np.linspace(strain_x_min, strain_x_max, N)
-                    levels2 = np.linspace(strain_y_min, strain_y_max, N)
-                    levels3 = np.linspace(shear_strain_min, shear_strain_max, N)
-                    ticks1 = list(np.linspace(strain_x_min, strain_x_max, min(N, 6)))
-                    ticks2 = list(np.linspace(strain_y_min, strain_y_max, min(N, 6)))
-                    ticks3 = list(np.linspace(shear_strain_min, shear_strain_max, min(N, 6)))
-                else:
-                    levels1 = np.array(config.CONTOUR_LEVELS)
-                    levels2 = np.array(config.CONTOUR_LEVELS)
-                    levels3 = np.array(config.CONTOUR_LEVELS)
-                    ticks1 = list(np.linspace(np.min(levels1), np.max(levels1), min(len(levels1), 6)))
-                    ticks2 = list(np.linspace(np.min(levels2), np.max(levels2), min(len(levels2), 6)))
-                    ticks3 = list(np.linspace(np.min(levels3), np.max(levels3), min(len(levels3), 6)))
-            else:
-                if isinstance(levels, int):
-                    N = levels
-                    # 自动取数据范围
-                    strain_x_min, strain_x_max = np.nanmin(strain_x), np.nanmax(strain_x)
-                    strain_y_min, strain_y_max = np.nanmin(strain_y), np.nanmax(strain_y)
-                    shear_strain_min, shear_strain_max = np.nanmin(shear_strain), np.nanmax(shear_strain)
-                    levels1 = np.linspace(strain_x_min, strain_x_max, N)
-                    levels2 = np.linspace(strain_y_min, strain_y_max, N)
-                    levels3 = np.linspace(shear_strain_min, shear_strain_max, N)
-                    ticks1 = list(np.linspace(strain_x_min, strain_x_max, min(N, 6)))
-                    ticks2 = list(np.linspace(strain_y_min, strain_y_max, min(N, 6)))
-                    ticks3 = list(np.linspace(shear_strain_min, shear_strain_max, min(N, 6)))
-                else:
-                    levels1 = np.array(levels)
-                    levels2 = np.array(levels)
-                    levels3 = np.array(levels)
-                    ticks1 = list(np.linspace(np.min(levels1), np.max(levels1), min(len(levels1), 6)))
-                    ticks2 = list(np.linspace(np.min(levels2), np.max(levels2), min(len(levels2), 6)))
-                    ticks3 = list(np.linspace(np.min(levels3), np.max(levels3), min(len(levels3), 6)))
-        fig, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(20, 6), dpi=config.DPI)
-        contour1 = ax1.contourf(xi, yi, strain_x, levels=levels1, cmap='RdBu_r', vmin=vmin, vmax=vmax, extend='both')
-        contour_lines1 = ax1.contour(xi, yi, strain_x, levels=contour_lines, colors='black', linewidths=0.5, alpha=0.7)
-        ax1.clabel(contour_lines1, inline=True, fontsize=8)
-        ax1.set_xlabel('X 坐标 (m)', fontproperties=my_font)
-        ax1.set_ylabel('Y 坐标 (m)', fontproperties=my_font)
-        ax1.set_title('X方向水平变形', fontproperties=my_font)
-        ax1.set_aspect('equal')
-        divider1 = make_axes_locatable(ax1)
-        cax1 = divider1.append_axes("right", size="5%", pad=0.1)
-        cbar1 = plt.colorbar(contour1, cax=cax1, ticks=ticks1, extendfrac=0)
-        cbar1.set_label('X方向水平变形 (mm/m)', fontproperties=my_font)
-        contour2 = ax2.contourf(xi, yi, strain_y, levels=levels2, cmap='RdBu_r', vmin=vmin, vmax=vmax, extend='both')
-        contour_lines2 = ax2.contour(xi, yi, strain_y, levels=contour_lines, colors='black', linewidths=0.5, alpha=0.7)
-        ax2.clabel(contour_lines2, inline=True, fontsize=8)
-        ax2.set_xlabel('X 坐标 (m)', fontproperties=my_font)
-        ax2.set_ylabel('Y 坐标 (m)', fontproperties=my_font)
-        ax2.set_title('Y方向水平变形', fontproperties=my_font)
-        ax2.set_aspect('equal')
-        divider2 = make_axes_locatable(ax2)
-        cax2 = divider2.append_axes("right", size="5%", pad=0.1)
-        cbar2 = plt.colorbar(contour2, cax=cax2, ticks=ticks2, extendfrac=0)
-        cbar2.set_label('Y方向水平变形 (mm/m)', fontproperties=my_font)
-        contour3 = ax3.contourf(xi, yi, shear_strain, levels=levels3, cmap='RdBu_r', vmin=vmin, vmax=vmax, extend='both')
-        contour_lines3 = ax3.contour(xi, yi, shear_strain, levels=contour_lines, colors='black', linewidths=0.5, alpha=0.7)
-        ax3.clabel(contour_lines3, inline=True, fontsize=8)
-        ax3.set_xlabel('X 坐标 (m)', fontproperties=my_font)
-        ax3.set_ylabel('Y 坐标 (m)', fontproperties=my_font)
-        ax3.set_title('剪切变形', fontproperties=my_font)
-        ax3.set_aspect('equal')
-        divider3 = make_axes_locatable(ax3)
-        cax3 = divider3.append_axes("right", size="5%", pad=0.1)
-        cbar3 = plt.colorbar(contour3, cax=cax3, ticks=ticks3, extendfrac=0)
-        cbar3.set_label('剪切变形 (mm/m)', fontproperties=my_font)
-        plt.tight_layout()
-        for fmt in config.SAVE_FORMATS:
-            save_path = os.path.join(config.RESULTS_DIR, f'{filename}.{fmt}')
-            plt.savefig(save_path, dpi=config.DPI, bbox_inches='tight')
-            print(f"已保存：{save_path}")
-        plt.close(fig)
\ No newline at end of file
+        panels = [(strain_x, 'X方向水平变形', 'X方向水平变形 (mm/m)'),
+                  (strain_y, 'Y方向水平变形', 'Y方向水平变形 (mm/m)'),
+                  (shear_strain, '剪切变形', '剪切变形 (mm/m)')]
+        self._plot_panels(xi, yi, panels, filename, (20, 6), 'RdBu_r',
+                          levels, vmin, vmax, contour_lines)
+
+    def plot_comparison(self, xi, yi, stack, labels, field, filename, cmap=None,
+                        vmin=None, vmax=None, contour_lines=10, symmetric=False, cbar_label=None):
+        """多方案并排云图，stack为(N, ny, nx)，全部子图共用同一色阶；symmetric用于差值图的对称色阶，cbar_label用于无量纲的比值图"""
+        name, unit = FIELD_LABELS[field]
+        if cbar_label is None:
+            cbar_label = f'{name} ({unit})'
+        if vmin is None or vmax is None:
+            vmin, vmax = float(np.nanmin(stack)), float(np.nanmax(stack))
+            if symmetric:
+                vmax = max(abs(vmin), abs(vmax))
+                vmin = -vmax
+        if vmax <= vmin:
+            # 各方案完全相同（如差值全为0）时给出一个可绘制的窄区间
+            vmin, vmax = vmin - 1e-9, vmax + 1e-9
+        panels = [(zi, f'{label} - {name}', cbar_label) for zi, label in zip(stack, labels)]
+        self._plot_panels(xi, yi, panels, filename, (7 * len(panels) + 2, 6), cmap or config.COLORMAP,
+                          vmin=vmin, vmax=vmax, contour_lines=contour_lines)
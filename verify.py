@@ -0,0 +1,27 @@
+import sys
+import argparse
+from src.verification import TOLERANCES, update_golden, verify
+
+
+def main():
+    parser = argparse.ArgumentParser(description="数值回归校验：用合成地表重跑DataProcessor并与基准数组比较")
+    parser.add_argument('--update', action='store_true', help="重新生成基准数组（仅在确认结果变化合理时使用）")
+    parser.add_argument('--rtol', type=float, help="覆盖全部字段的相对容差（如float32模式）")
+    parser.add_argument('--atol', type=float, help="覆盖全部字段的绝对容差")
+    args = parser.parse_args()
+
+    if args.update:
+        update_golden()
+        return 0
+
+    tolerances = TOLERANCES
+    if args.rtol is not None or args.atol is not None:
+        tolerances = {key: (args.rtol if args.rtol is not None else rtol, args.atol if args.atol is not None else atol)
+                      for key, (rtol, atol) in TOLERANCES.items()}
+    ok = verify(tolerances)
+    print("=== 全部用例通过 ===" if ok else "=== 存在超出容差的字段 ===")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())